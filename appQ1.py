@@ -3,58 +3,162 @@ Question 1: This implementation assumes that the user is running ollama with a l
 
 I implemented the streamlit session state to try and explore additional features of the streamlit framework.
 """
+import asyncio
+import hashlib
+import math
+from collections import deque
+
+import diskcache
 import streamlit as st
 import ollama
 
-from pypdf import PdfReader
-from docx import Document
-from bs4 import BeautifulSoup
+from extract import extract_text_from_uploaded_file, guard_upload_size
 
 
 st.title("Input to AI")
 
 
-# text extract function for plain text, PDF, Word, and HTML
-def extract_text_from_uploaded_file(uploaded_file) -> str:
-    filename = uploaded_file.name.lower()
+MODEL_NAME = "llama3.2:latest"
+
+SYSTEM_PROMPT = (
+    "You are an assistant. When document text is provided in the "
+    "conversation, answer the user's question using that text."
+)
+
+# Replies for identical prompts are cached on disk, so clicking Send
+# twice or re-asking the same question costs no model round-trip
+_LLM_CACHE = diskcache.Cache(".llm_cache")
+
+
+# One Ollama HTTP client per session: reusing its connection pool saves
+# a new TCP handshake to the local server on every call after the first
+def _get_client() -> ollama.Client:
+    if "ollama_client" not in st.session_state:
+        st.session_state.ollama_client = ollama.Client()
+    return st.session_state.ollama_client
+
+
+def _cache_key(messages: list) -> str:
+    digest = hashlib.sha256(MODEL_NAME.encode())
+    for msg in messages:
+        digest.update(msg["role"].encode())
+        digest.update(msg["content"].encode())
+    return digest.hexdigest()
+
+
+# Retrieval settings: rather than pasting the whole document into every
+# prompt (latency and cost grow with tokens), the document is chunked and
+# embedded once, and each question only gets the most relevant chunks
+EMBED_MODEL = "nomic-embed-text"
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 100
+RETRIEVAL_TOP_K = 5
+
+
+def _split_into_chunks(text: str) -> list:
+    chunks = []
+    step = CHUNK_SIZE - CHUNK_OVERLAP
+    for start in range(0, len(text), step):
+        chunk = text[start:start + CHUNK_SIZE]
+        if chunk.strip():
+            chunks.append(chunk)
+        if start + CHUNK_SIZE >= len(text):
+            break
+    return chunks
+
+
+# Embed every chunk of the document once per upload (cached across reruns)
+@st.cache_data(max_entries=4, show_spinner=False)
+def _embed_document(file_text: str):
+    client = _get_client()
+    chunks = _split_into_chunks(file_text)
+    vectors = [
+        client.embeddings(model=EMBED_MODEL, prompt=chunk)["embedding"]
+        for chunk in chunks
+    ]
+    return chunks, vectors
+
+
+def _cosine(a: list, b: list) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
 
-    # Plain text
-    if filename.endswith(".txt"):
-        return uploaded_file.read().decode("utf-8", errors="ignore")
 
-    # PDF
-    elif filename.endswith(".pdf"):
-        reader = PdfReader(uploaded_file)
-        text_chunks = []
-        for page in reader.pages:
-            page_text = page.extract_text() or ""
-            text_chunks.append(page_text)
-        return "\n".join(text_chunks).strip()
+# Pick the chunks most similar to the question; short documents that fit
+# in top_k chunks anyway are sent whole
+def _retrieve_context(file_text: str, question: str) -> str:
+    chunks, vectors = _embed_document(file_text)
+    if len(chunks) <= RETRIEVAL_TOP_K:
+        return file_text
 
-    # Word
-    elif filename.endswith(".docx"):
-        doc = Document(uploaded_file)
-        return "\n".join(p.text for p in doc.paragraphs).strip()
+    q_vector = _get_client().embeddings(model=EMBED_MODEL, prompt=question)["embedding"]
+    ranked = sorted(
+        range(len(chunks)),
+        key=lambda i: _cosine(q_vector, vectors[i]),
+        reverse=True,
+    )
+    # Keep the selected chunks in document order for readability
+    top = sorted(ranked[:RETRIEVAL_TOP_K])
+    return "\n\n".join(chunks[i] for i in top)
 
-    # HTML
-    elif filename.endswith(".html") or filename.endswith(".htm"):
-        html_bytes = uploaded_file.read()
-        html_text = html_bytes.decode("utf-8", errors="ignore")
-        soup = BeautifulSoup(html_text, "html.parser")
 
-        return soup.get_text(separator="\n").strip()
+# LLM call (Ollama) for a single message list, using the async client so
+# the Streamlit script thread is not blocked while the model generates
+async def ask_model(client: ollama.AsyncClient, messages: list) -> str:
+    key = _cache_key(messages)
+    cached = _LLM_CACHE.get(key)
+    if cached is not None:
+        return cached
 
-    # Error notification
-    else:
-        return "<<Unsupported file type>>"
+    response = await client.chat(
+        model=MODEL_NAME,
+        messages=messages,
+    )
+    reply = response["message"]["content"]
+    _LLM_CACHE[key] = reply
+    return reply
 
 
+# Fire every pending prompt concurrently, so a batch of questions waits
+# roughly as long as the slowest one instead of the sum of all of them.
+# The async client is shared across the batch but cannot outlive it: it
+# is bound to the event loop asyncio.run creates and closes.
+async def ask_model_batch(message_lists: list) -> list:
+    client = ollama.AsyncClient()
+    return await asyncio.gather(*(ask_model(client, m) for m in message_lists))
+
+
+# Stream tokens for a single prompt, so the first words show up after
+# tens of milliseconds instead of waiting for the whole completion
+def ask_model_stream(messages: list):
+    stream = _get_client().chat(
+        model=MODEL_NAME,
+        messages=messages,
+        stream=True,
+    )
+    for chunk in stream:
+        yield chunk["message"]["content"]
+
+
+# History is bounded so memory does not grow without limit in a long
+# session, and only the newest messages are rendered in full each rerun
+HISTORY_MAX_MESSAGES = 200
+HISTORY_VISIBLE_MESSAGES = 20
+
 # Initialize conversation history
 if "history" not in st.session_state:
-    st.session_state.history = []
+    st.session_state.history = deque(maxlen=HISTORY_MAX_MESSAGES)
+
 
-# Text input
-question = st.text_input("Enter your question:")
+def format_message(msg: dict) -> str:
+    speaker = "You" if msg["role"] == "user" else "AI"
+    return f"**{speaker}:** {msg['content']}"
+
+# Text input - several questions can be batched by putting one per line
+# (Ollama runs them concurrently; raise OLLAMA_NUM_PARALLEL, e.g. to 4,
+# so the server actually overlaps the generations)
+question = st.text_area("Enter your question(s), one per line:")
 
 # File upload
 uploaded_file = st.file_uploader(
@@ -64,9 +168,12 @@ uploaded_file = st.file_uploader(
 
 file_text = None
 
-# Extract text from the uploaded file
+# Extract text from the uploaded file (cached across reruns)
 if uploaded_file is not None:
-    file_text = extract_text_from_uploaded_file(uploaded_file)
+    guard_upload_size(uploaded_file)
+    file_text = extract_text_from_uploaded_file(
+        uploaded_file.name, uploaded_file.getvalue()
+    )
 
 # Send button to connect content streamlit content to the LLM
 if st.button("Send"):
@@ -85,36 +192,65 @@ if st.button("Send"):
             {"role": "user", "content": display_message}
         )
 
-        if file_text:
-            prompt_for_model = f"""
-You are an assistant. Answer the user's question using the document text provided.
+        def build_messages(q: str) -> list:
+            messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+            if file_text:
+                # The document goes into its own message, so the large
+                # context string is passed through as-is instead of being
+                # copied into a fresh prompt string for every question
+                context = _retrieve_context(file_text, q)
+                messages.append(
+                    {"role": "user", "content": f"Document text:\n{context}"}
+                )
+            messages.append({"role": "user", "content": q})
+            return messages
 
-Question:
-{question}
+        questions = [q.strip() for q in question.splitlines() if q.strip()]
 
-Document text:
-{file_text}
-"""
+        if len(questions) == 1:
+            messages_for_model = build_messages(questions[0])
+            key = _cache_key(messages_for_model)
+            reply = _LLM_CACHE.get(key)
+            if reply is None:
+                # LLM call (Ollama, streamed) - render tokens as they
+                # arrive in a temporary placeholder; the finished reply is
+                # shown from the history loop below, so the placeholder is
+                # cleared after
+                placeholder = st.empty()
+                reply = ""
+                for token in ask_model_stream(messages_for_model):
+                    reply += token
+                    placeholder.markdown(f"**AI:** {reply}")
+                placeholder.empty()
+                _LLM_CACHE[key] = reply
         else:
-            prompt_for_model = question
-
-        # LLM call (Ollama)
-        response = ollama.chat(
-            model="llama3.2:latest",
-            messages=[{"role": "user", "content": prompt_for_model}]
-        )
-
-        reply = response["message"]["content"]
+            # Several questions: fire them concurrently and join the
+            # replies, so the batch takes ~max(latency) not sum(latency)
+            replies = asyncio.run(
+                ask_model_batch([build_messages(q) for q in questions])
+            )
+            reply = "\n\n---\n\n".join(replies)
 
         # Display assistant response
         st.session_state.history.append(
             {"role": "assistant", "content": reply}
         )
 
-# Write the conversation history to Streamlit frontend
+# Drop memoized replies, e.g. after pulling a newer model
+if st.button("Clear reply cache"):
+    _LLM_CACHE.clear()
+
+# Write the conversation history to Streamlit frontend; older messages
+# are collapsed so per-rerun render cost stays bounded, and each section
+# is a single st.markdown call (one websocket delta) instead of one
+# element per message
 st.write("### Conversation")
-for msg in st.session_state.history:
-    if msg["role"] == "user":
-        st.markdown(f"**You:** {msg['content']}")
-    else:
-        st.markdown(f"**AI:** {msg['content']}")
+history = list(st.session_state.history)
+if len(history) > HISTORY_VISIBLE_MESSAGES:
+    with st.expander("Earlier messages"):
+        st.markdown(
+            "\n\n".join(format_message(m) for m in history[:-HISTORY_VISIBLE_MESSAGES])
+        )
+st.markdown(
+    "\n\n".join(format_message(m) for m in history[-HISTORY_VISIBLE_MESSAGES:])
+)
@@ -28,63 +28,142 @@ have leveraged a more capable model for usecase.
 """
 
 import re
+from collections import deque
+
 import streamlit as st
 
-from pypdf import PdfReader
-from docx import Document
-from bs4 import BeautifulSoup
+from extract import extract_text_from_uploaded_file, guard_upload_size
 
 
 st.title("Abbreviation Index Generator")
 
 
-# Helper Function: extract raw text from uploaded files (txt, pdf, docx, html)
-def extract_text_from_uploaded_file(uploaded_file) -> str:
-    filename = uploaded_file.name.lower()
-
-    text = ""
-
-    # Plain text
-    if filename.endswith(".txt"):
-        text = uploaded_file.read().decode("utf-8", errors="ignore")
-
-    # PDF
-    elif filename.endswith(".pdf"):
-        reader = PdfReader(uploaded_file)
-        text_chunks = []
-        for page in reader.pages:
-            page_text = page.extract_text() or ""
-            text_chunks.append(page_text)
-        text = "\n".join(text_chunks)
-
-    # Word
-    elif filename.endswith(".docx"):
-        doc = Document(uploaded_file)
-        text = "\n".join(p.text for p in doc.paragraphs)
-
-    # HTML
-    elif filename.endswith(".html") or filename.endswith(".htm"):
-        html_bytes = uploaded_file.read()
-        html_text = html_bytes.decode("utf-8", errors="ignore")
-        soup = BeautifulSoup(html_text, "html.parser")
-        text = soup.get_text(separator="\n")
-
-    # Unsupported type -> empty string
-    else:
-        text = ""
-
-    # Clean-up step: fix hyphenated words split across lines
-    text = re.sub(r"(\w+)-\s+(\w+)", r"\1\2", text)
-
-    return text.strip()
+# The article is scanned with a single combined regex instead of one
+# pass for "term (ABBR)" matches plus a second word-tokenizing pass per
+# match. google-re2 runs the pattern with a linear-time DFA, so use it
+# when it is installed and fall back to the standard library otherwise.
+try:
+    import re2 as _abbr_regex_engine
+except ImportError:
+    _abbr_regex_engine = re
+
+# On very large corpora even a linear regex engine loses to a scanner
+# specialized for this one pattern: a Numba-JITed loop over the raw
+# bytes that only looks for "(ABBR)" spans. Optional, like re2.
+try:
+    import numpy as np
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except ImportError:
+    _NUMBA_AVAILABLE = False
+
+# Compiled once at import time: either a word token (same tokens the old
+# WORD_RE produced) or an ALL-CAPS abbreviation in parentheses
+SCAN_RE = _abbr_regex_engine.compile(r"([A-Za-z]+)|\(([A-Z]{2,8})\)")
+# hyphenated words split across lines by PDF extraction
+HYPHEN_RE = re.compile(r"(\w+)-\s+(\w+)")
+
+# Characters that may appear between a term's words and its abbreviation
+# without breaking adjacency (the old pattern's [A-Za-z0-9\s\-] class)
+_GAP_CHARS = set(" \t\n\r-0123456789")
+# The extractor only ever looks at the last 4 words before an abbreviation
+_TERM_WINDOW = 4
+
+
+# Single pass over the article: track the last few adjacent words in a
+# small deque and emit (words, abbr) whenever "(ABBR)" comes up, instead
+# of re-scanning each matched span for its word tokens
+def _scan_abbreviations_regex(text: str):
+    window = deque(maxlen=_TERM_WINDOW)
+    last_end = None
+
+    for m in SCAN_RE.finditer(text):
+        # Punctuation between tokens breaks the term/abbreviation adjacency
+        if last_end is not None and any(
+            ch not in _GAP_CHARS for ch in text[last_end:m.start()]
+        ):
+            window.clear()
+        last_end = m.end()
+
+        word = m.group(1)
+        if word is not None:
+            window.append(word)
+        elif window:
+            yield list(window), m.group(2)
+            window.clear()
+
+
+# Byte-level twins of SCAN_RE's character classes, used by the scanner
+# below (all class members are ASCII, so byte offsets are safe even in
+# UTF-8 text)
+_GAP_BYTES = frozenset(b" \t\n\r-0123456789")
+
+
+# Walk left from the "(" collecting up to _TERM_WINDOW adjacent letter
+# runs; the first byte that is neither a letter nor a gap byte breaks
+# adjacency, mirroring the forward scanner's window reset
+def _preceding_words(data: bytes, open_pos: int) -> list:
+    words = []
+    i = open_pos - 1
+    while len(words) < _TERM_WINDOW and i >= 0:
+        while i >= 0 and data[i] in _GAP_BYTES:
+            i -= 1
+        j = i
+        while j >= 0 and (65 <= data[j] <= 90 or 97 <= data[j] <= 122):
+            j -= 1
+        if j == i:
+            break
+        words.append(data[j + 1:i + 1].decode())
+        i = j
+    words.reverse()
+    return words
+
+
+if _NUMBA_AVAILABLE:
+
+    # Hot loop compiled to native code: find every "(ABBR)" span, where
+    # ABBR is 2-8 uppercase ASCII letters, with one pass over the bytes
+    @njit(cache=True)
+    def _find_abbr_spans(arr):
+        n = arr.size
+        # Worst case is one abbreviation per four bytes: "(AB)"
+        starts = np.empty(n // 4 + 1, dtype=np.int32)
+        ends = np.empty(n // 4 + 1, dtype=np.int32)
+        count = 0
+        i = 0
+        while i < n:
+            if arr[i] == 40:  # "("
+                j = i + 1
+                # Consume up to 9 uppercase letters so 8-letter spans can
+                # be told apart from too-long ones
+                while j < n and j - i - 1 < 9 and 65 <= arr[j] <= 90:
+                    j += 1
+                length = j - i - 1
+                if 2 <= length <= 8 and j < n and arr[j] == 41:  # ")"
+                    starts[count] = i + 1
+                    ends[count] = j
+                    count += 1
+                    i = j
+            i += 1
+        return starts[:count], ends[:count]
+
+    def _scan_abbreviations(text: str):
+        data = text.encode("utf-8")
+        starts, ends = _find_abbr_spans(np.frombuffer(data, dtype=np.uint8))
+        for start, end in zip(starts, ends):
+            words = _preceding_words(data, start - 1)
+            if words:
+                yield words, data[start:end].decode()
+
+else:
+    _scan_abbreviations = _scan_abbreviations_regex
 
 
 # Helper Function: simplified abbreviation extractor using regex
 def extract_abbreviations_simple(text: str) -> str:
 
     # Only match ALL-CAPS abbreviations, length 2–8
-    pattern = r'([A-Za-z][A-Za-z0-9\s\-]+?)\s*\(([A-Z]{2,8})\)'
-    matches = re.findall(pattern, text)
+    matches = list(_scan_abbreviations(text))
 
     if not matches:
         return "No abbreviations found."
@@ -98,35 +177,28 @@ def extract_abbreviations_simple(text: str) -> str:
 
     abbr_dict = {}
 
-    for full, abbr in matches:
-        abbr = abbr.strip()
-
-        # Only keep all-uppercase abbreviations
-        if not abbr.isupper():
-            continue
-
-        # Break the full phrase into word tokens
-        words = re.findall(r"[A-Za-z]+", full)
-        if not words:
-            continue
-
-        # Build candidate phrases from the last 4, 3, and 2 words
-        candidate_phrases = []
-        if len(words) >= 4:
-            candidate_phrases.append(" ".join(words[-4:]))
-        if len(words) >= 3:
-            candidate_phrases.append(" ".join(words[-3:]))
-        if len(words) >= 2:
-            candidate_phrases.append(" ".join(words[-2:]))
-
-        if not candidate_phrases:
-            candidate_phrases.append(" ".join(words))
-
-        # Score candidate phrases by how many words start with uppercase letters
-        def score(phrase: str) -> int:
-            return sum(1 for w in phrase.split() if w and w[0].isupper())
-
-        best_full = max(candidate_phrases, key=score)
+    # The scanner only emits all-uppercase abbreviations with at least
+    # one adjacent word, so no per-match filtering is needed here
+    for words, abbr in matches:
+
+        # Consider the last 4, 3, and 2 words as candidate terms and keep
+        # the one with the most capitalized words. A cumulative count of
+        # capitalized words makes each window's score a single
+        # subtraction, so every word is tested with isupper exactly once.
+        # Longest window wins ties, matching the old max() behavior.
+        cum_caps = [0]
+        for w in words:
+            cum_caps.append(cum_caps[-1] + (1 if w[0].isupper() else 0))
+        total_caps = cum_caps[-1]
+
+        best_words, best_score = words, -1
+        for k in (4, 3, 2):
+            if len(words) >= k:
+                current_score = total_caps - cum_caps[len(words) - k]
+                if current_score > best_score:
+                    best_words, best_score = words[-k:], current_score
+
+        best_full = " ".join(best_words)
 
         # Apply manual override if we have one for this abbreviation
         if abbr in ABBR_OVERRIDES:
@@ -143,9 +215,22 @@ def extract_abbreviations_simple(text: str) -> str:
     return "\n".join(lines)
 
 
+# History is bounded so memory does not grow without limit in a long
+# session, and only the newest messages are rendered in full each rerun
+HISTORY_MAX_MESSAGES = 200
+HISTORY_VISIBLE_MESSAGES = 20
+
 # Initialize conversation history for display
 if "history" not in st.session_state:
-    st.session_state.history = []
+    st.session_state.history = deque(maxlen=HISTORY_MAX_MESSAGES)
+
+
+def format_message(msg: dict) -> str:
+    if msg["role"] == "user":
+        return f"**You:** {msg['content']}"
+    # The fenced code block keeps the index in monospace, matching the
+    # old st.text rendering
+    return f"**Abbreviation Index:**\n```text\n{msg['content']}\n```"
 
 # Text input (for user instruction / logging)
 # question = st.text_input(
@@ -160,7 +245,13 @@ uploaded_file = st.file_uploader(
 
 file_text = None
 if uploaded_file is not None:
-    file_text = extract_text_from_uploaded_file(uploaded_file)
+    guard_upload_size(uploaded_file)
+    # Cached across reruns, so the article is only parsed once
+    file_text = extract_text_from_uploaded_file(
+        uploaded_file.name, uploaded_file.getvalue()
+    )
+    # Clean-up step: fix hyphenated words split across lines
+    file_text = HYPHEN_RE.sub(r"\1\2", file_text)
 
 
 # Main action: generate abbreviation index
@@ -185,12 +276,16 @@ if st.button("Send"):
         )
 
 
-# Display conversation
+# Display conversation; older messages are collapsed so per-rerun
+# render cost stays bounded, and each section is a single st.markdown
+# call (one websocket delta) instead of one element per message
 st.write("### Conversation")
-for msg in st.session_state.history:
-    if msg["role"] == "user":
-        st.markdown(f"**You:** {msg['content']}")
-    else:
-        st.markdown("**Abbreviation Index:**")
-
-        st.text(msg["content"])
+history = list(st.session_state.history)
+if len(history) > HISTORY_VISIBLE_MESSAGES:
+    with st.expander("Earlier messages"):
+        st.markdown(
+            "\n\n".join(format_message(m) for m in history[:-HISTORY_VISIBLE_MESSAGES])
+        )
+st.markdown(
+    "\n\n".join(format_message(m) for m in history[-HISTORY_VISIBLE_MESSAGES:])
+)
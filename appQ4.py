@@ -15,54 +15,171 @@ environment variables or secrets files are required. This also allows
 deployment to Streamlit Cloud.
 """
 
+import asyncio
+import hashlib
+import math
+from collections import deque
+
+import diskcache
 import streamlit as st
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
-from pypdf import PdfReader
-from docx import Document
-from bs4 import BeautifulSoup
+from extract import extract_text_from_uploaded_file, guard_upload_size
 
 
 st.title("Input to AI (gpt-4o-mini)")
 
 
-# Helper: extract text from uploaded files
-def extract_text_from_uploaded_file(uploaded_file) -> str:
-    filename = uploaded_file.name.lower()
-
-    # Plain text
-    if filename.endswith(".txt"):
-        return uploaded_file.read().decode("utf-8", errors="ignore")
-
-    # PDF
-    elif filename.endswith(".pdf"):
-        reader = PdfReader(uploaded_file)
-        text_chunks = []
-        for page in reader.pages:
-            page_text = page.extract_text() or ""
-            text_chunks.append(page_text)
-        return "\n".join(text_chunks).strip()
-
-    # Word
-    elif filename.endswith(".docx"):
-        doc = Document(uploaded_file)
-        return "\n".join(p.text for p in doc.paragraphs).strip()
-
-    # HTML
-    elif filename.endswith(".html") or filename.endswith(".htm"):
-        html_bytes = uploaded_file.read()
-        html_text = html_bytes.decode("utf-8", errors="ignore")
-        soup = BeautifulSoup(html_text, "html.parser")
-        return soup.get_text(separator="\n").strip()
-
-    # Unsupported type
-    else:
-        return "<<Unsupported file type>>"
+MODEL_NAME = "gpt-4o-mini"
+
+# Replies for identical prompts are cached on disk, so clicking Send
+# twice or re-asking the same question costs no paid API round-trip
+_LLM_CACHE = diskcache.Cache(".llm_cache")
+
+
+# One OpenAI client per session, rebuilt only when the API key changes:
+# reusing the underlying httpx connection pool saves the TCP+TLS
+# handshake (easily 100-300 ms) on every call after the first
+def _get_client(api_key: str) -> OpenAI:
+    key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+    if st.session_state.get("openai_client_key") != key_hash:
+        st.session_state.openai_client = OpenAI(api_key=api_key)
+        st.session_state.openai_client_key = key_hash
+    return st.session_state.openai_client
+
 
+def _cache_key(messages: list) -> str:
+    digest = hashlib.sha256(MODEL_NAME.encode())
+    for msg in messages:
+        digest.update(msg["role"].encode())
+        digest.update(msg["content"].encode())
+    return digest.hexdigest()
+
+
+SYSTEM_PROMPT = (
+    "You are a helpful assistant. The user will provide "
+    "the full text of a document inside the message itself. "
+    "You CAN read and use that text. Do NOT say that you "
+    "cannot access attachments or PDFs. Instead, directly "
+    "answer the question using the document text provided."
+)
+
+
+# Retrieval settings: rather than pasting the whole document into every
+# prompt (latency and cost grow with tokens), the document is chunked and
+# embedded once, and each question only gets the most relevant chunks
+EMBED_MODEL = "text-embedding-3-small"
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 100
+RETRIEVAL_TOP_K = 5
+
+
+def _split_into_chunks(text: str) -> list:
+    chunks = []
+    step = CHUNK_SIZE - CHUNK_OVERLAP
+    for start in range(0, len(text), step):
+        chunk = text[start:start + CHUNK_SIZE]
+        if chunk.strip():
+            chunks.append(chunk)
+        if start + CHUNK_SIZE >= len(text):
+            break
+    return chunks
+
+
+# Embed every chunk of the document once per upload (cached across reruns)
+@st.cache_data(max_entries=4, show_spinner=False)
+def _embed_document(api_key: str, file_text: str):
+    client = _get_client(api_key)
+    chunks = _split_into_chunks(file_text)
+    response = client.embeddings.create(model=EMBED_MODEL, input=chunks)
+    vectors = [item.embedding for item in response.data]
+    return chunks, vectors
+
+
+def _cosine(a: list, b: list) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+# Pick the chunks most similar to the question; short documents that fit
+# in top_k chunks anyway are sent whole
+def _retrieve_context(api_key: str, file_text: str, question: str) -> str:
+    chunks, vectors = _embed_document(api_key, file_text)
+    if len(chunks) <= RETRIEVAL_TOP_K:
+        return file_text
+
+    client = _get_client(api_key)
+    response = client.embeddings.create(model=EMBED_MODEL, input=[question])
+    q_vector = response.data[0].embedding
+    ranked = sorted(
+        range(len(chunks)),
+        key=lambda i: _cosine(q_vector, vectors[i]),
+        reverse=True,
+    )
+    # Keep the selected chunks in document order for readability
+    top = sorted(ranked[:RETRIEVAL_TOP_K])
+    return "\n\n".join(chunks[i] for i in top)
+
+
+# LLM call (OpenAI, async) for a single message list
+async def ask_model(client, messages: list) -> str:
+    key = _cache_key(messages)
+    cached = _LLM_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    completion = await client.chat.completions.create(
+        model=MODEL_NAME,
+        messages=messages,
+        temperature=0.2,
+    )
+    reply = completion.choices[0].message.content
+    _LLM_CACHE[key] = reply
+    return reply
+
+
+# Fire every pending prompt concurrently so a batch of questions waits
+# roughly as long as the slowest one instead of the sum of all of them.
+# The async client is shared across the batch but cannot outlive it: it
+# is bound to the event loop asyncio.run creates and closes.
+async def ask_model_batch(api_key: str, message_lists: list) -> list:
+    client = AsyncOpenAI(api_key=api_key)
+    try:
+        return await asyncio.gather(*(ask_model(client, m) for m in message_lists))
+    finally:
+        await client.close()
+
+
+# Stream tokens for a single prompt, so the first words show up after
+# tens of milliseconds instead of waiting for the whole completion
+def ask_model_stream(api_key: str, messages: list):
+    client = _get_client(api_key)
+    stream = client.chat.completions.create(
+        model=MODEL_NAME,
+        messages=messages,
+        temperature=0.2,
+        stream=True,
+    )
+    for chunk in stream:
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+
+# History is bounded so memory does not grow without limit in a long
+# session, and only the newest messages are rendered in full each rerun
+HISTORY_MAX_MESSAGES = 200
+HISTORY_VISIBLE_MESSAGES = 20
 
 # Initialize conversation history
 if "history" not in st.session_state:
-    st.session_state.history = []
+    st.session_state.history = deque(maxlen=HISTORY_MAX_MESSAGES)
+
+
+def format_message(msg: dict) -> str:
+    speaker = "You" if msg["role"] == "user" else "AI"
+    return f"**{speaker}:** {msg['content']}"
 
 # API key input
 api_key = st.text_input(
@@ -71,8 +188,9 @@ api_key = st.text_input(
     help="Your key is used only in this session and is not stored permanently."
 )
 
-# Question input
-question = st.text_input("Enter your question:")
+# Question input - several questions can be batched by putting one per
+# line; they are sent to the API concurrently
+question = st.text_area("Enter your question(s), one per line:")
 
 # File upload
 uploaded_file = st.file_uploader(
@@ -82,9 +200,12 @@ uploaded_file = st.file_uploader(
 
 file_text = None
 
-# Extract text from uploaded file (if any)
+# Extract text from uploaded file (if any, cached across reruns)
 if uploaded_file is not None:
-    file_text = extract_text_from_uploaded_file(uploaded_file)
+    guard_upload_size(uploaded_file)
+    file_text = extract_text_from_uploaded_file(
+        uploaded_file.name, uploaded_file.getvalue()
+    )
 
 # Main action: send to GPT-4o-mini via API 
 if st.button("Send"):
@@ -110,44 +231,47 @@ if st.button("Send"):
             {"role": "user", "content": display_message}
         )
 
-        if file_text:
-            prompt_for_model = f"""
-You are given a question and the full text of a document.
-
-Question:
-{question}
-
-Document text:
-{file_text}
-"""
-        else:
-            prompt_for_model = question
+        def build_messages(q: str) -> list:
+            messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+            if file_text:
+                # The document goes into its own message, so the large
+                # context string is passed through as-is instead of being
+                # copied into a fresh prompt string for every question;
+                # stable message prefixes also let OpenAI's automatic
+                # prompt caching kick in across turns
+                context = _retrieve_context(api_key, file_text, q)
+                messages.append(
+                    {"role": "user", "content": f"Document text:\n{context}"}
+                )
+            messages.append({"role": "user", "content": q})
+            return messages
 
         try:
-            client = OpenAI(api_key=api_key)
-
-            completion = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a helpful assistant. The user will provide "
-                            "the full text of a document inside the message itself. "
-                            "You CAN read and use that text. Do NOT say that you "
-                            "cannot access attachments or PDFs. Instead, directly "
-                            "answer the question using the document text provided."
-                        ),
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt_for_model,
-                    },
-                ],
-                temperature=0.2,
-            )
-
-            reply = completion.choices[0].message.content
+            questions = [q.strip() for q in question.splitlines() if q.strip()]
+
+            if len(questions) == 1:
+                messages_for_model = build_messages(questions[0])
+                key = _cache_key(messages_for_model)
+                reply = _LLM_CACHE.get(key)
+                if reply is None:
+                    # LLM call (OpenAI, streamed) - render tokens as they
+                    # arrive in a temporary placeholder; the finished
+                    # reply is shown from the history loop below, so the
+                    # placeholder is cleared after
+                    placeholder = st.empty()
+                    reply = ""
+                    for token in ask_model_stream(api_key, messages_for_model):
+                        reply += token
+                        placeholder.markdown(f"**AI:** {reply}")
+                    placeholder.empty()
+                    _LLM_CACHE[key] = reply
+            else:
+                # Several questions: fire them concurrently and join the
+                # replies, so the batch takes ~max(latency) not sum(latency)
+                replies = asyncio.run(
+                    ask_model_batch(api_key, [build_messages(q) for q in questions])
+                )
+                reply = "\n\n---\n\n".join(replies)
 
         except Exception as e:
             reply = f"Error calling OpenAI API: {e}"
@@ -156,10 +280,21 @@ Document text:
             {"role": "assistant", "content": reply}
         )
 
-# Display conversation history
+# Drop memoized replies, e.g. after a model or prompt change
+if st.button("Clear reply cache"):
+    _LLM_CACHE.clear()
+
+# Display conversation history; older messages are collapsed so
+# per-rerun render cost stays bounded, and each section is a single
+# st.markdown call (one websocket delta) instead of one element per
+# message
 st.write("### Conversation")
-for msg in st.session_state.history:
-    if msg["role"] == "user":
-        st.markdown(f"**You:** {msg['content']}")
-    else:
-        st.markdown(f"**AI:** {msg['content']}")
+history = list(st.session_state.history)
+if len(history) > HISTORY_VISIBLE_MESSAGES:
+    with st.expander("Earlier messages"):
+        st.markdown(
+            "\n\n".join(format_message(m) for m in history[:-HISTORY_VISIBLE_MESSAGES])
+        )
+st.markdown(
+    "\n\n".join(format_message(m) for m in history[-HISTORY_VISIBLE_MESSAGES:])
+)
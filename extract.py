@@ -0,0 +1,151 @@
+"""
+Shared document text extraction for the Question 1, 2 and 4 apps.
+
+All three apps accept the same upload types (plain text, PDF, Word,
+HTML), so the extraction helpers live here once instead of being
+copy-pasted per app. File types are dispatched through a dict keyed on
+the file extension, and results are memoized with st.cache_data so a
+given upload is only parsed once per session.
+"""
+
+import io
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import lxml.etree as ET
+import streamlit as st
+
+from pypdf import PdfReader
+from bs4 import BeautifulSoup
+
+
+# Below this page count the process pool costs more to start than the
+# serial loop takes to finish
+PARALLEL_PDF_MIN_PAGES = 8
+
+# Uploads above this size are rejected before any parsing; an unbounded
+# upload would be fully materialized as Python strings during extraction
+# and again during prompt construction
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+
+
+# Stop the script run with an error message if the upload is too big;
+# call before reading the file's bytes
+def guard_upload_size(uploaded_file) -> None:
+    if uploaded_file.size > MAX_UPLOAD_BYTES:
+        st.error(
+            f"File too large ({uploaded_file.size / (1024 * 1024):.0f} MB); "
+            f"the limit is {MAX_UPLOAD_BYTES // (1024 * 1024)} MB."
+        )
+        st.stop()
+
+
+# We only need raw strings out of the PDF, so skip pypdf's spec
+# compliance checks (strict=False) and its layout heuristics: plain
+# extraction mode, upright text only (rotated text is page furniture
+# like watermarks, not article prose)
+_PDF_TEXT_KWARGS = {"extraction_mode": "plain", "orientations": (0,)}
+
+
+# One PdfReader per worker process, reused across the pages it handles
+@lru_cache(maxsize=4)
+def _pdf_reader(path: str) -> PdfReader:
+    return PdfReader(path, strict=False)
+
+
+def _extract_pdf_page(args) -> str:
+    path, index = args
+    return _pdf_reader(path).pages[index].extract_text(**_PDF_TEXT_KWARGS) or ""
+
+
+# pypdf's extract_text is pure-Python and CPU-bound, so long PDFs gain
+# close to a core-count speedup from extracting pages in parallel
+def _extract_pdf_text(pdf_stream) -> str:
+    reader = PdfReader(pdf_stream, strict=False)
+    num_pages = len(reader.pages)
+
+    if num_pages < PARALLEL_PDF_MIN_PAGES:
+        return "\n".join(
+            page.extract_text(**_PDF_TEXT_KWARGS) or "" for page in reader.pages
+        )
+
+    # Write the upload to disk once so worker processes can open it
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        pdf_stream.seek(0)
+        tmp.write(pdf_stream.read())
+        tmp.flush()
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            texts = executor.map(
+                _extract_pdf_page,
+                [(tmp.name, i) for i in range(num_pages)],
+            )
+            return "\n".join(texts)
+
+
+# Plain text
+def _extract_txt(data: bytes) -> str:
+    return data.decode("utf-8", errors="ignore")
+
+
+# PDF - pages are extracted in parallel for long documents
+def _extract_pdf(data: bytes) -> str:
+    return _extract_pdf_text(io.BytesIO(data))
+
+
+_DOCX_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+# Word - a .docx is a zip archive, and all we need is the text inside
+# the <w:t> elements of word/document.xml. Streaming that file through
+# lxml's iterparse skips python-docx's per-element Paragraph/Run object
+# construction, which dominates extraction time on large documents.
+def _extract_docx(data: bytes) -> str:
+    parts = []
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        with archive.open("word/document.xml") as document_xml:
+            for _, element in ET.iterparse(
+                document_xml, tag=(_DOCX_NS + "t", _DOCX_NS + "p")
+            ):
+                if element.tag.endswith("}t"):
+                    if element.text:
+                        parts.append(element.text)
+                else:
+                    # End of a paragraph: newline, then free the subtree
+                    parts.append("\n")
+                    element.clear()
+    return "".join(parts)
+
+
+# HTML - parse with lxml (C extension, much faster than the pure-Python
+# html.parser) and hand BeautifulSoup the byte stream so we do not hold
+# both the raw bytes and a decoded copy in memory
+def _extract_html(data: bytes) -> str:
+    soup = BeautifulSoup(io.BytesIO(data), "lxml")
+    return soup.get_text(separator="\n")
+
+
+# Unsupported type -> empty string (the uploaders restrict the allowed
+# types anyway, so this is only a safety net)
+def _extract_unsupported(data: bytes) -> str:
+    return ""
+
+
+# O(1) dispatch on file extension instead of an if/elif chain
+EXTRACTORS = {
+    ".txt": _extract_txt,
+    ".pdf": _extract_pdf,
+    ".docx": _extract_docx,
+    ".html": _extract_html,
+    ".htm": _extract_html,
+}
+
+
+# Streamlit reruns each script on every widget interaction, so the result
+# is memoized on (filename, raw bytes) to parse each upload only once
+@st.cache_data(max_entries=8, show_spinner=False)
+def extract_text_from_uploaded_file(filename: str, data: bytes) -> str:
+    ext = os.path.splitext(filename.lower())[1]
+    return EXTRACTORS.get(ext, _extract_unsupported)(data).strip()